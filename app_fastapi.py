@@ -1,19 +1,210 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from typing import Optional, Union
+import asyncio
+import io
+import logging
+import orjson
+import os
 import pandas as pd
 
-app = FastAPI(title="Pricing Calculator")
+from pricing import PricingCalculator, allowed_file
+
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted, matching the Flask app's MAX_CONTENT_LENGTH
+MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+class MaxBodySizeMiddleware:
+    """Answer 413 for request bodies larger than max_size.
+
+    A declared Content-Length is checked up front, and streamed bytes are
+    counted as they arrive, so an oversized upload is never spooled in full.
+    """
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        too_large = ORJSONResponse({'error': 'File too large. Maximum size is 16MB.'}, status_code=413)
+        content_length = dict(scope['headers']).get(b'content-length', b'')
+        if content_length.isdigit() and int(content_length) > self.max_size:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {'type': 'http.disconnect'}
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_size and not response_started:
+                    # Answer now and tell the app the client went away, so
+                    # it stops reading the body
+                    rejected = True
+                    await too_large(scope, receive, send)
+                    return {'type': 'http.disconnect'}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+
+app = FastAPI(title="Pricing Calculator", default_response_class=ORJSONResponse)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=['*'],
+    allow_methods=['GET', 'POST', 'OPTIONS'],
+    allow_headers=['Content-Type', 'Authorization', 'Accept'],
+    allow_credentials=False,
+)
+app.add_middleware(MaxBodySizeMiddleware, max_size=MAX_CONTENT_LENGTH)
+
+# Headers that stop browsers and proxies from caching downloads
+NO_CACHE_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+}
+
+with open(os.path.join(os.path.dirname(__file__), "templates", "index.html"), encoding="utf-8") as f:
+    INDEX_HTML = f.read()
+
+async def _json_object(request: Request) -> Optional[dict]:
+    """Return the request's JSON body, or None if it is not a JSON object."""
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
 
-# Serve your HTML template
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
-    with open("templates/index.html") as f:
-        return HTMLResponse(f.read())
-
-# Your bulk upload endpoint
-@app.post("/bulk_upload")
-async def bulk_upload(file: UploadFile = File(...)):
-    # Your existing processing logic here
-    # But with async/await for better performance
-    pass
\ No newline at end of file
+@app.get("/upload", response_class=HTMLResponse)
+async def index():
+    return HTMLResponse(INDEX_HTML)
+
+@app.post("/calculate")
+async def calculate(request: Request):
+    data = await _json_object(request)
+    if data is None:
+        return ORJSONResponse({'success': False, 'error': 'Request body must be a JSON object'}, status_code=400)
+
+    ingredient_name = data.get('ingredient_name', '')
+    quantity_input = data.get('quantity_input', '')
+    price_input = data.get('price_input', '')
+
+    return PricingCalculator.calculate_pricing(ingredient_name, quantity_input, price_input)
+
+@app.post("/upload")
+async def upload_file(file: Union[UploadFile, str, None] = File(None)):
+    try:
+        if file is None:
+            return ORJSONResponse({'error': 'No file uploaded'}, status_code=400)
+
+        # Browsers submit an empty file field with filename="", which
+        # Starlette parses as a plain string rather than an UploadFile
+        if isinstance(file, str) or not file.filename:
+            return ORJSONResponse({'error': 'No file selected'}, status_code=400)
+        filename = file.filename
+
+        if not allowed_file(filename):
+            return ORJSONResponse({'error': 'Only Excel (.xlsx, .xls) and CSV files are allowed'}, status_code=400)
+
+        logger.debug("File received: %s", filename)
+
+        # pandas parsing is blocking, run it off the event loop
+        df = await asyncio.to_thread(PricingCalculator.read_upload, file.file, filename)
+        results, error = await asyncio.to_thread(PricingCalculator.process_upload, df)
+        if results is None:
+            return ORJSONResponse({'error': error}, status_code=400)
+
+        return {
+            'success': True,
+            'results': results,
+            'total_items': len(results)
+        }
+
+    except Exception as e:
+        logger.error("Error in upload_file: %s (%s)", e, type(e).__name__)
+        return ORJSONResponse({
+            'success': False,
+            'error': f'Error processing file: {str(e)}'
+        }, status_code=500)
+
+def _build_excel(df: pd.DataFrame) -> bytes:
+    output = io.BytesIO()
+    PricingCalculator.write_excel(df, output)
+    return output.getvalue()
+
+@app.post("/download")
+async def download_results(request: Request):
+    try:
+        data = await _json_object(request)
+        if data is None:
+            return ORJSONResponse({'success': False, 'error': 'Request body must be a JSON object'}, status_code=400)
+
+        if not data:
+            return ORJSONResponse({'error': 'No data received'}, status_code=400)
+
+        results = data.get('results', [])
+        file_format = data.get('format', 'excel')  # 'excel' or 'csv'
+
+        if not results:
+            return ORJSONResponse({'error': 'No results to download'}, status_code=400)
+
+        # Limit results to prevent memory issues
+        if len(results) > 1000:
+            return ORJSONResponse({'error': 'Too many results. Maximum 1000 items allowed for download.'}, status_code=400)
+
+        df = PricingCalculator.results_to_frame(results)
+
+        if file_format == 'csv':
+            return StreamingResponse(
+                PricingCalculator.iter_csv(df),
+                media_type='text/csv',
+                headers={**NO_CACHE_HEADERS, 'Content-Disposition': 'attachment; filename="pricing_results.csv"'}
+            )
+
+        try:
+            content = await asyncio.to_thread(_build_excel, df)
+        except Exception as e:
+            return ORJSONResponse({'error': f'Failed to create Excel file: {str(e)}'}, status_code=500)
+
+        return Response(
+            content,
+            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={**NO_CACHE_HEADERS, 'Content-Disposition': 'attachment; filename="pricing_results.xlsx"'}
+        )
+
+    except Exception as e:
+        return ORJSONResponse({'error': f'Download failed: {str(e)}'}, status_code=500)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5000)
@@ -1,11 +1,15 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, send_file, stream_with_context
 from flask_cors import CORS
-import re
-import pandas as pd
+import orjson
 import io
+import logging
 from werkzeug.utils import secure_filename
 import os
-from typing import Dict, Optional
+
+from pricing import PricingCalculator, allowed_file
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 # Configure CORS with more permissive settings
@@ -25,137 +29,9 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # Disable caching for downloads
 if not os.path.exists('uploads'):
     os.makedirs('uploads')
 
-class PricingCalculator:
-    @staticmethod
-    def parse_quantity(quantity_str: str) -> tuple[Optional[float], str]:
-        """Parse quantity string and return (total_grams, error_message)."""
-        try:
-            # Remove spaces and convert to lowercase
-            original_str = quantity_str
-            quantity_str = quantity_str.replace(" ", "").lower()
-            
-            # Check if input is just numbers without unit
-            if re.match(r'^\d+(?:\.\d+)?$', quantity_str):
-                return None, "Please specify the unit of measurement (kg, g, gm, mg, l, ml). Example: 400g, 1.2kg, 500mg, 2l, 250ml"
-            
-            # Handle multiplication format (e.g., "10x100g", "20*1200g", "6x2x230g")
-            # Check if there are multiplication operators
-            if 'x' in quantity_str or '*' in quantity_str:
-                # Split by both 'x' and '*' operators
-                parts = re.split(r'[x*]', quantity_str)
-                
-                if len(parts) < 2:
-                    return None, "Invalid multiplication format. Use formats like '10x100g', '6x2x230g', '400g', '1.2kg'"
-                
-                # Extract unit from the last part
-                last_part = parts[-1]
-                unit_match = re.match(r'(\d+(?:\.\d+)?)([a-z]*)', last_part)
-                
-                if not unit_match:
-                    return None, "Invalid quantity format. Use formats like '10x100g', '6x2x230g', '400g', '1.2kg'"
-                
-                unit = unit_match.group(2)
-                
-                # Check if unit is missing in multiplication format
-                if not unit:
-                    return None, "Please specify the unit of measurement. Example: 10x100g, 6x2x230g, 5x200mg, 3x1.5kg, 2x500ml"
-                
-                # Calculate total by multiplying all numeric parts
-                try:
-                    total_weight = 1.0
-                    # Multiply all parts except extract the number from the last part
-                    for i, part in enumerate(parts):
-                        if i == len(parts) - 1:
-                            # Last part contains the unit, extract only the number
-                            total_weight *= float(unit_match.group(1))
-                        else:
-                            total_weight *= float(part)
-                except ValueError:
-                    return None, "Invalid numbers in multiplication format. Use formats like '10x100g', '6x2x230g'"
-            else:
-                # Handle single quantity format (e.g., "400g", "1.2kg")
-                single_pattern = r'(\d+(?:\.\d+)?)([a-z]*)'  
-                single_match = re.match(single_pattern, quantity_str)
-                
-                if single_match:
-                    total_weight = float(single_match.group(1))
-                    unit = single_match.group(2)
-                    
-                    # Check if unit is missing
-                    if not unit:
-                        return None, "Please specify the unit of measurement (kg, g, gm, mg, l, ml). Example: 400g, 1.2kg, 500mg, 2l, 250ml"
-                else:
-                    return None, "Invalid quantity format. Use formats like '10x100g', '400g', '1.2kg', '500mg'"
-            
-            # Convert to grams - handle both weight and volume units
-            if unit in ["kg", "kilogram", "kilograms"]:
-                return total_weight * 1000, ""
-            elif unit in ["g", "gm", "gram", "grams"]:
-                return total_weight, ""
-            elif unit in ["mg", "milligram", "milligrams"]:
-                return total_weight / 1000, ""
-            elif unit in ["l", "ltr", "litre", "litres", "liter", "liters"]:
-                # Convert litres to grams (assuming density of water: 1L = 1000g)
-                return total_weight * 1000, ""
-            elif unit in ["ml", "millilitre", "millilitres", "milliliter", "milliliters"]:
-                # Convert millilitres to grams (assuming density of water: 1ml = 1g)
-                return total_weight, ""
-            else:
-                return None, f"Unsupported unit '{unit}'. Please use kg, g, gm, mg, l, or ml"
-                
-        except (ValueError, AttributeError):
-            return None, "Invalid quantity format. Use formats like '10x100g', '400g', '1.2kg', '500mg'"
-    
-    @staticmethod
-    def calculate_pricing(ingredient_name: str, quantity_input: str, price_input: str) -> Dict:
-        """Calculate pricing per different units."""
-        result = {
-            "success": False,
-            "error": "",
-            "results": {},
-            "ingredient_name": ingredient_name
-        }
-        
-        if not ingredient_name.strip():
-            result["error"] = "Please enter an ingredient name."
-            return result
-        
-        if not quantity_input.strip():
-            result["error"] = "Please enter a quantity."
-            return result
-        
-        if not price_input.strip():
-            result["error"] = "Please enter a price."
-            return result
-        
-        try:
-            price = float(price_input)
-        except ValueError:
-            result["error"] = "Please enter a valid price."
-            return result
-        
-        total_grams, parse_error = PricingCalculator.parse_quantity(quantity_input)
-        
-        if total_grams is None:
-            result["error"] = parse_error
-            return result
-        
-        if total_grams <= 0:
-            result["error"] = "Quantity must be greater than zero."
-            return result
-        
-        # Calculate price per gram
-        price_per_gram = price / total_grams
-        
-        # Calculate for different units
-        result["results"] = {
-            "kg": round(price_per_gram * 1000, 2),
-            "g": round(price_per_gram, 4),
-            "mg": round(price_per_gram / 1000, 6)
-        }
-        result["success"] = True
-        
-        return result
+def ojsonify(payload) -> Response:
+    """jsonify replacement that serializes with orjson."""
+    return Response(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY), mimetype='application/json')
 
 @app.route('/')
 def index():
@@ -165,7 +41,7 @@ def index():
 def calculate():
     # Handle preflight CORS requests
     if request.method == 'OPTIONS':
-        response = jsonify({'status': 'ok'})
+        response = ojsonify({'status': 'ok'})
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Accept')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
@@ -176,13 +52,13 @@ def calculate():
     price_input = data.get('price_input', '')
     
     result = PricingCalculator.calculate_pricing(ingredient_name, quantity_input, price_input)
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/upload', methods=['GET', 'POST', 'OPTIONS'])
 def upload_file():
     # Handle preflight CORS requests
     if request.method == 'OPTIONS':
-        response = jsonify({'status': 'ok'})
+        response = ojsonify({'status': 'ok'})
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Accept')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
@@ -192,91 +68,32 @@ def upload_file():
     if request.method == 'GET':
         return render_template('index.html')
     try:
-        print(f"Upload request received. Method: {request.method}")
-        print(f"Request headers: {dict(request.headers)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Upload request received. Method: %s", request.method)
+            logger.debug("Request headers: %s", dict(request.headers))
         
         if 'file' not in request.files:
-            print("Error: No file in request")
-            return jsonify({'error': 'No file uploaded'}), 400
+            logger.debug("Error: No file in request")
+            return ojsonify({'error': 'No file uploaded'}), 400
         
         file = request.files['file']
         if file.filename == '':
-            print("Error: Empty filename")
-            return jsonify({'error': 'No file selected'}), 400
+            logger.debug("Error: Empty filename")
+            return ojsonify({'error': 'No file selected'}), 400
         
-        print(f"File received: {file.filename}")
+        logger.debug("File received: %s", file.filename)
         
         if not allowed_file(file.filename):
-            print(f"Error: Invalid file type for {file.filename}")
-            return jsonify({'error': 'Only Excel (.xlsx, .xls) and CSV files are allowed'}), 400
-        # Read the file
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file, header=None)
-        else:
-            df = pd.read_excel(file, header=None)
-        
-        # Validate that file has exactly 3 columns
-        if len(df.columns) != 3:
-            return jsonify({
-                'error': 'File must contain exactly 3 columns (Ingredient name, Quantity, Pricing)'
-            }), 400
-        
-        # Rename columns to standard names regardless of headers
-        df.columns = ['Ingredient name', 'Quantity', 'Pricing']
+            logger.debug("Error: Invalid file type for %s", file.filename)
+            return ojsonify({'error': 'Only Excel (.xlsx, .xls) and CSV files are allowed'}), 400
         
-        # Limit to 1000 rows
-        if len(df) > 1000:
-            return jsonify({
-                'error': 'File contains more than 1000 items. Maximum allowed is 1000.'
-            }), 400
+        # Read and price the file
+        df = PricingCalculator.read_upload(file, file.filename)
+        results, error = PricingCalculator.process_upload(df)
+        if results is None:
+            return ojsonify({'error': error}), 400
         
-        # Process the data
-        results = []
-        
-        for index, row in df.iterrows():
-            ingredient = str(row['Ingredient name']).strip()
-            quantity = str(row['Quantity']).strip() if pd.notna(row['Quantity']) else ''
-            pricing = row['Pricing'] if pd.notna(row['Pricing']) else 0
-            
-            if not quantity or quantity.lower() in ['nan', 'none', '']:
-                results.append({
-                    'ingredient_name': ingredient,
-                    'quantity_input': 'Not provided',
-                    'price_input': pricing,
-                    'results': None,
-                    'status': 'Quantity was not provided, so pricing could not be calculated'
-                })
-            else:
-                # Parse the quantity to get grams
-                total_grams, parse_error = PricingCalculator.parse_quantity(quantity)
-                
-                if total_grams is None:
-                    results.append({
-                        'ingredient_name': ingredient,
-                        'quantity_input': quantity,
-                        'price_input': pricing,
-                        'results': None,
-                        'status': f'Error: {parse_error}'
-                    })
-                else:
-                    # Calculate pricing per kg, g, mg
-                    price_per_gram = pricing / total_grams if total_grams > 0 else 0
-                    price_per_kg = price_per_gram * 1000
-                    price_per_mg = price_per_gram / 1000
-                    
-                    results.append({
-                        'ingredient_name': ingredient,
-                        'quantity_input': quantity,
-                        'price_input': pricing,
-                        'results': {
-                            'kg': f'AED {price_per_kg:.2f}',
-                            'g': f'AED {price_per_gram:.2f}',
-                            'mg': f'AED {price_per_mg:.4f}'
-                        },
-                        'status': 'Calculated successfully'
-                    })
-        
-        response = jsonify({
+        response = ojsonify({
             'success': True,
             'results': results,
             'total_items': len(results)
@@ -290,9 +107,8 @@ def upload_file():
         return response, 200
     
     except Exception as e:
-        print(f"Error in upload_file: {str(e)}")
-        print(f"Exception type: {type(e).__name__}")
-        return jsonify({
+        logger.error("Error in upload_file: %s (%s)", e, type(e).__name__)
+        return ojsonify({
             'success': False,
             'error': f'Error processing file: {str(e)}'
         }), 500
@@ -301,7 +117,7 @@ def upload_file():
 def download_results():
     # Handle preflight CORS requests
     if request.method == 'OPTIONS':
-        response = jsonify({'status': 'ok'})
+        response = ojsonify({'status': 'ok'})
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Accept')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
@@ -309,61 +125,26 @@ def download_results():
     try:
         data = request.get_json()
         if not data:
-            return jsonify({'error': 'No data received'}), 400
+            return ojsonify({'error': 'No data received'}), 400
             
         results = data.get('results', [])
         file_format = data.get('format', 'excel')  # 'excel' or 'csv'
         
         if not results:
-            return jsonify({'error': 'No results to download'}), 400
+            return ojsonify({'error': 'No results to download'}), 400
         
         # Limit results to prevent memory issues
         if len(results) > 1000:
-            return jsonify({'error': 'Too many results. Maximum 1000 items allowed for download.'}), 400
+            return ojsonify({'error': 'Too many results. Maximum 1000 items allowed for download.'}), 400
         
-        # Process results to handle new data format from frontend
-        processed_data = []
-        for item in results:
-            if isinstance(item, dict):
-                # Handle new object format from frontend
-                row = {
-                    'Ingredient Name': item.get('ingredient_name', ''),
-                    'Quantity': item.get('quantity_input', ''),
-                    'Price': item.get('price_input', ''),
-                    'Per KG': item.get('per_kg', 'N/A'),
-                    'Per G': item.get('per_g', 'N/A'),
-                    'Per MG': item.get('per_mg', 'N/A'),
-                    'Status': item.get('status', '')
-                }
-                processed_data.append(row)
-            elif isinstance(item, list) and len(item) >= 5:
-                # Handle legacy array format
-                row = {
-                    'Ingredient Name': item[0] if len(item) > 0 else '',
-                    'Quantity': item[1] if len(item) > 1 else '',
-                    'Price': item[2] if len(item) > 2 else '',
-                    'Per KG': item[3] if len(item) > 3 else 'N/A',
-                    'Per G': item[4] if len(item) > 4 else 'N/A',
-                    'Per MG': item[5] if len(item) > 5 else 'N/A',
-                    'Status': item[6] if len(item) > 6 else ''
-                }
-                processed_data.append(row)
-        
-        # Create DataFrame from processed results
-        df = pd.DataFrame(processed_data)
-        
-        # Create file in memory with error handling
-        output = io.BytesIO()
+        df = PricingCalculator.results_to_frame(results)
         
         if file_format == 'csv':
-            df.to_csv(output, index=False, encoding='utf-8')
-            output.seek(0)
-            
-            response = send_file(
-                output,
+            # Stream the CSV so the first rows go out before the rest are encoded
+            response = Response(
+                stream_with_context(PricingCalculator.iter_csv(df)),
                 mimetype='text/csv',
-                as_attachment=True,
-                download_name='pricing_results.csv'
+                headers={'Content-Disposition': 'attachment; filename=pricing_results.csv'}
             )
             response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
             response.headers['Pragma'] = 'no-cache'
@@ -371,8 +152,9 @@ def download_results():
             return response
         else:
             try:
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Pricing Results')
+                # Create file in memory
+                output = io.BytesIO()
+                PricingCalculator.write_excel(df, output)
                 output.seek(0)
                 
                 response = send_file(
@@ -386,13 +168,10 @@ def download_results():
                 response.headers['Expires'] = '0'
                 return response
             except Exception as e:
-                return jsonify({'error': f'Failed to create Excel file: {str(e)}'}), 500
+                return ojsonify({'error': f'Failed to create Excel file: {str(e)}'}), 500
                 
     except Exception as e:
-        return jsonify({'error': f'Download failed: {str(e)}'}), 500
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv', 'xlsx', 'xls'}
+        return ojsonify({'error': f'Download failed: {str(e)}'}), 500
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,454 @@
+import functools
+import math
+import os
+import re
+from typing import Dict, Final, Iterator, List, Optional
+
+import pandas as pd
+import xlsxwriter
+from openpyxl import load_workbook
+
+# pyarrow is optional - without it CSV uploads are parsed by pandas' C engine
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+# Quantity patterns used by the vectorized bulk upload path
+_MULT_RE: Final = re.compile(r'(\d+)[x*](\d+(?:\.\d+)?)([a-z]*)')
+_SINGLE_RE: Final = re.compile(r'(\d+(?:\.\d+)?)([a-z]*)')
+
+# Maximum number of items accepted in a bulk upload
+MAX_UPLOAD_ROWS: Final = 1000
+
+# Cells read as missing from CSV uploads - pandas' default na_values
+_CSV_NULL_VALUES: Final = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+# Grams per unit - volume units assume the density of water (1ml = 1g)
+_UNIT_TO_GRAMS: Final[Dict[str, float]] = {
+    'kg': 1000.0, 'kilogram': 1000.0, 'kilograms': 1000.0,
+    'g': 1.0, 'gm': 1.0, 'gram': 1.0, 'grams': 1.0,
+    'mg': 0.001, 'milligram': 0.001, 'milligrams': 0.001,
+    'l': 1000.0, 'ltr': 1000.0, 'litre': 1000.0, 'litres': 1000.0, 'liter': 1000.0, 'liters': 1000.0,
+    'ml': 1.0, 'millilitre': 1.0, 'millilitres': 1.0, 'milliliter': 1.0, 'milliliters': 1.0,
+}
+
+def _scan(quantity_str: str) -> tuple[Optional[float], str]:
+    """Scan a leading number and unit, e.g. '1.2kg' -> (1.2, 'kg').
+
+    Hand-written equivalent of _SINGLE_RE.match: the number is digits with an
+    optional fractional part and the unit is the run of a-z that follows.
+    Returns (None, '') when the string does not start with a digit.
+    """
+    n = len(quantity_str)
+    i = 0
+    while i < n and quantity_str[i].isdecimal():
+        i += 1
+    if i == 0:
+        return None, ""
+    if i + 1 < n and quantity_str[i] == '.' and quantity_str[i + 1].isdecimal():
+        i += 2
+        while i < n and quantity_str[i].isdecimal():
+            i += 1
+    
+    j = i
+    while j < n and 'a' <= quantity_str[j] <= 'z':
+        j += 1
+    return float(quantity_str[:i]), quantity_str[i:j]
+
+class PricingCalculator:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def parse_quantity(quantity_str: str) -> tuple[Optional[float], str]:
+        """Parse quantity string and return (total_grams, error_message).
+
+        Results are memoized - bulk uploads tend to repeat the same few
+        quantity strings.
+        """
+        try:
+            # Remove spaces and convert to lowercase
+            quantity_str = quantity_str.replace(" ", "").lower()
+            
+            # Handle multiplication format (e.g., "10x100g", "20*1200g", "6x2x230g")
+            # Check if there are multiplication operators
+            if 'x' in quantity_str or '*' in quantity_str:
+                # Split by both 'x' and '*' operators
+                parts = quantity_str.replace('*', 'x').split('x')
+                
+                # Extract unit from the last part
+                weight, unit = _scan(parts[-1])
+                
+                if weight is None:
+                    return None, "Invalid quantity format. Use formats like '10x100g', '6x2x230g', '400g', '1.2kg'"
+                
+                # Check if unit is missing in multiplication format
+                if not unit:
+                    return None, "Please specify the unit of measurement. Example: 10x100g, 6x2x230g, 5x200mg, 3x1.5kg, 2x500ml"
+                
+                # Calculate total by multiplying all numeric parts
+                try:
+                    total_weight = 1.0
+                    for part in parts[:-1]:
+                        total_weight *= float(part)
+                    total_weight *= weight
+                except ValueError:
+                    return None, "Invalid numbers in multiplication format. Use formats like '10x100g', '6x2x230g'"
+            else:
+                # Handle single quantity format (e.g., "400g", "1.2kg")
+                weight, unit = _scan(quantity_str)
+                
+                if weight is None:
+                    return None, "Invalid quantity format. Use formats like '10x100g', '400g', '1.2kg', '500mg'"
+                total_weight = weight
+                
+                # Check if unit is missing (also covers bare numbers like "400")
+                if not unit:
+                    return None, "Please specify the unit of measurement (kg, g, gm, mg, l, ml). Example: 400g, 1.2kg, 500mg, 2l, 250ml"
+            
+            # Convert to grams - handle both weight and volume units
+            factor = _UNIT_TO_GRAMS.get(unit)
+            if factor is None:
+                return None, f"Unsupported unit '{unit}'. Please use kg, g, gm, mg, l, or ml"
+            return total_weight * factor, ""
+                
+        except (ValueError, AttributeError):
+            return None, "Invalid quantity format. Use formats like '10x100g', '400g', '1.2kg', '500mg'"
+    
+    @staticmethod
+    def quantities_to_grams(quantities: pd.Series) -> pd.Series:
+        """Vectorized parse of a quantity column into total grams.
+
+        Only the common '400g' and '10x100g' shapes with a known unit are
+        resolved here; every other row is NaN so the caller can fall back to
+        parse_quantity for the detailed error message.
+        """
+        q = quantities.astype(str).str.replace(' ', '', regex=False).str.lower()
+        
+        parts = q.str.extract(f'^{_MULT_RE.pattern}$')
+        parts.columns = ['count', 'weight', 'unit']
+        single = q.str.extract(f'^{_SINGLE_RE.pattern}$')
+        weight = parts['weight'].fillna(single[0])
+        unit = parts['unit'].fillna(single[1])
+        
+        factor = unit.map(_UNIT_TO_GRAMS)
+        return parts['count'].astype(float).fillna(1) * weight.astype(float) * factor
+    
+    @staticmethod
+    def calculate_pricing(ingredient_name: str, quantity_input: str, price_input: str) -> Dict:
+        """Calculate pricing per different units."""
+        result = {
+            "success": False,
+            "error": "",
+            "results": {},
+            "ingredient_name": ingredient_name
+        }
+        
+        if not ingredient_name.strip():
+            result["error"] = "Please enter an ingredient name."
+            return result
+        
+        error, prices = PricingCalculator._price_per_unit(quantity_input, price_input)
+        if prices is None:
+            result["error"] = error
+            return result
+        
+        result["results"] = {"kg": prices[0], "g": prices[1], "mg": prices[2]}
+        result["success"] = True
+        
+        return result
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=2048)
+    def _price_per_unit(quantity_input: str, price_input: str) -> tuple[str, Optional[tuple[float, float, float]]]:
+        """Return (error_message, (per_kg, per_g, per_mg)) for one quantity and price.
+
+        Memoized, so repeated submissions skip all parsing and rounding. The
+        result is an immutable tuple that calculate_pricing copies into a
+        fresh dict for every call.
+        """
+        if not quantity_input.strip():
+            return "Please enter a quantity.", None
+        
+        if not price_input.strip():
+            return "Please enter a price.", None
+        
+        try:
+            price = float(price_input)
+        except ValueError:
+            return "Please enter a valid price.", None
+        
+        total_grams, parse_error = PricingCalculator.parse_quantity(quantity_input)
+        
+        if total_grams is None:
+            return parse_error, None
+        
+        if total_grams <= 0:
+            return "Quantity must be greater than zero.", None
+        
+        # Calculate price per gram
+        price_per_gram = price / total_grams
+        
+        # Calculate for different units
+        return "", (
+            round(price_per_gram * 1000, 2),
+            round(price_per_gram, 4),
+            round(price_per_gram / 1000, 6)
+        )
+    
+    @staticmethod
+    def read_upload(file, filename: str) -> pd.DataFrame:
+        """Read an uploaded CSV or Excel file, treating every row as data."""
+        # Only parse one row past the limit - that is enough for process_upload
+        # to reject oversized files without reading the rest of them
+        if filename.endswith('.csv'):
+            if pa is not None:
+                return PricingCalculator._read_csv_arrow(file)
+            return pd.read_csv(file, header=None, nrows=MAX_UPLOAD_ROWS + 1)
+        if filename.endswith('.xlsx'):
+            return PricingCalculator._read_xlsx(file)
+        return pd.read_excel(file, header=None, nrows=MAX_UPLOAD_ROWS + 1)
+    
+    @staticmethod
+    def _read_csv_arrow(file) -> pd.DataFrame:
+        """Parse an uploaded CSV with pyarrow, keeping every cell as text.
+
+        The upload is memory-mapped when it is a named file on disk and
+        streamed otherwise. Batches are read only until the row limit is
+        exceeded, so oversized files are never read in full. Files pyarrow
+        rejects, such as ragged rows or text that is not UTF-8, are re-read
+        with pandas' C engine.
+        """
+        # pyarrow reads a few dozen blocks ahead of the parser, so small
+        # blocks keep a stream from being read far past the row limit
+        read_options = pacsv.ReadOptions(autogenerate_column_names=True, block_size=1 << 16)
+        path = getattr(file, 'name', None)
+        
+        try:
+            if isinstance(path, str) and os.path.isfile(path):
+                with pa.memory_map(path) as source:
+                    return PricingCalculator._read_csv_batches(source, read_options)
+            # Not closed - closing a PythonFile closes the upload with it
+            return PricingCalculator._read_csv_batches(pa.PythonFile(file, mode='r'), read_options)
+        except pa.ArrowInvalid:
+            # pyarrow needs every row to have the same number of cells and
+            # valid UTF-8 - pandas pads short rows with NaN and raises its
+            # own decode errors
+            file.seek(0)
+            return pd.read_csv(file, header=None, nrows=MAX_UPLOAD_ROWS + 1)
+    
+    @staticmethod
+    def _read_csv_batches(source, read_options) -> pd.DataFrame:
+        """Read up to one row past the limit from an arrow CSV source."""
+        # Peek at the first block for the column names, then read every
+        # column as a string so nothing is inferred as a number or as binary
+        column_names = pacsv.open_csv(source, read_options=read_options).schema.names
+        source.seek(0)
+        convert_options = pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in column_names},
+            null_values=_CSV_NULL_VALUES,
+            strings_can_be_null=True
+        )
+        reader = pacsv.open_csv(source, read_options=read_options, convert_options=convert_options)
+        batches = []
+        num_rows = 0
+        for batch in reader:
+            batches.append(batch)
+            num_rows += batch.num_rows
+            if num_rows > MAX_UPLOAD_ROWS:
+                break
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+        return table.slice(0, MAX_UPLOAD_ROWS + 1).to_pandas()
+    
+    @staticmethod
+    def _read_xlsx(file) -> pd.DataFrame:
+        """Read the cell values of the first sheet straight from openpyxl.
+
+        The workbook is streamed in read-only mode without styles, formulas or
+        external links, skipping pd.read_excel's type inference passes. Empty
+        trailing cells and rows are dropped the same way pandas does.
+        """
+        workbook = load_workbook(file, read_only=True, data_only=True, keep_links=False)
+        try:
+            # The first sheet, like pd.read_excel - not whichever one was last active
+            sheet = workbook.worksheets[0]
+            # Ignore the stored sheet dimensions, which some writers get wrong
+            sheet.reset_dimensions()
+            data = []
+            width = 0
+            for row in sheet.iter_rows(max_row=MAX_UPLOAD_ROWS + 1, values_only=True):
+                cells = list(row)
+                while cells and cells[-1] is None:
+                    cells.pop()
+                width = max(width, len(cells))
+                data.append(cells)
+        finally:
+            workbook.close()
+        
+        while data and not data[-1]:
+            data.pop()
+        
+        # Pad every row to the widest one, with NaN for empty cells
+        nan = float('nan')
+        return pd.DataFrame([
+            [nan if value is None else value for value in cells] + [nan] * (width - len(cells))
+            for cells in data
+        ])
+    
+    @staticmethod
+    def process_upload(df: pd.DataFrame) -> tuple[Optional[List[Dict]], str]:
+        """Price every row of an uploaded sheet and return (results, error_message)."""
+        # Validate that file has exactly 3 columns
+        if len(df.columns) != 3:
+            return None, 'File must contain exactly 3 columns (Ingredient name, Quantity, Pricing)'
+        
+        # Rename columns to standard names regardless of headers
+        df.columns = ['Ingredient name', 'Quantity', 'Pricing']
+        
+        # Coerce prices to floats once - blank or non-numeric cells count as 0
+        df['Pricing'] = pd.to_numeric(df['Pricing'], errors='coerce').fillna(0.0)
+        
+        # Limit to MAX_UPLOAD_ROWS rows
+        if len(df) > MAX_UPLOAD_ROWS:
+            return None, f'File contains more than {MAX_UPLOAD_ROWS} items. Maximum allowed is {MAX_UPLOAD_ROWS}.'
+        
+        # Normalize the text columns once instead of per row
+        ingredients = df['Ingredient name'].map(str).str.strip()
+        quantities = df['Quantity'].map(str).str.strip()
+        quantity_missing = df['Quantity'].isna() | quantities.str.lower().isin(['nan', 'none', ''])
+        
+        # Parse the quantities to grams, falling back to the full parser for
+        # shapes the vectorized pass could not resolve
+        total_grams = PricingCalculator.quantities_to_grams(quantities)
+        fallback = quantities[total_grams.isna() & ~quantity_missing].map(PricingCalculator.parse_quantity)
+        total_grams = total_grams.fillna(fallback.map(lambda parsed: parsed[0]).astype(float))
+        parse_errors = fallback.map(lambda parsed: parsed[1]).reindex(df.index, fill_value='')
+        
+        # Calculate and format pricing per kg, g, mg for the whole column at once
+        price_per_gram = (df['Pricing'] / total_grams.where(total_grams > 0)).fillna(0.0)
+        per_kg = (price_per_gram * 1000).map('AED {:.2f}'.format)
+        per_g = price_per_gram.map('AED {:.2f}'.format)
+        per_mg = (price_per_gram / 1000).map('AED {:.4f}'.format)
+        
+        # Process the data, iterating plain column values rather than
+        # building a Series per row
+        results = []
+        rows = zip(
+            ingredients.tolist(),
+            quantities.tolist(),
+            quantity_missing.tolist(),
+            df['Pricing'].tolist(),
+            parse_errors.tolist(),
+            per_kg.tolist(),
+            per_g.tolist(),
+            per_mg.tolist()
+        )
+        
+        for ingredient, quantity, missing, pricing, parse_error, kg, g, mg in rows:
+            if missing:
+                results.append({
+                    'ingredient_name': ingredient,
+                    'quantity_input': 'Not provided',
+                    'price_input': pricing,
+                    'results': None,
+                    'status': 'Quantity was not provided, so pricing could not be calculated'
+                })
+            elif parse_error:
+                results.append({
+                    'ingredient_name': ingredient,
+                    'quantity_input': quantity,
+                    'price_input': pricing,
+                    'results': None,
+                    'status': f'Error: {parse_error}'
+                })
+            else:
+                results.append({
+                    'ingredient_name': ingredient,
+                    'quantity_input': quantity,
+                    'price_input': pricing,
+                    'results': {'kg': kg, 'g': g, 'mg': mg},
+                    'status': 'Calculated successfully'
+                })
+        
+        return results, ""
+    
+    @staticmethod
+    def results_to_frame(results: List) -> pd.DataFrame:
+        """Build the download table from the results posted back by the frontend."""
+        # Process results to handle new data format from frontend
+        processed_data = []
+        for item in results:
+            if isinstance(item, dict):
+                # Handle new object format from frontend
+                row = {
+                    'Ingredient Name': item.get('ingredient_name', ''),
+                    'Quantity': item.get('quantity_input', ''),
+                    'Price': item.get('price_input', ''),
+                    'Per KG': item.get('per_kg', 'N/A'),
+                    'Per G': item.get('per_g', 'N/A'),
+                    'Per MG': item.get('per_mg', 'N/A'),
+                    'Status': item.get('status', '')
+                }
+                processed_data.append(row)
+            elif isinstance(item, list) and len(item) >= 5:
+                # Handle legacy array format
+                row = {
+                    'Ingredient Name': item[0] if len(item) > 0 else '',
+                    'Quantity': item[1] if len(item) > 1 else '',
+                    'Price': item[2] if len(item) > 2 else '',
+                    'Per KG': item[3] if len(item) > 3 else 'N/A',
+                    'Per G': item[4] if len(item) > 4 else 'N/A',
+                    'Per MG': item[5] if len(item) > 5 else 'N/A',
+                    'Status': item[6] if len(item) > 6 else ''
+                }
+                processed_data.append(row)
+        
+        return pd.DataFrame(processed_data)
+    
+    @staticmethod
+    def iter_csv(df: pd.DataFrame, chunksize: int = 200) -> Iterator[str]:
+        """Yield the download table as CSV text, a chunk of rows at a time."""
+        yield df.iloc[:0].to_csv(index=False)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize].to_csv(index=False, header=False)
+    
+    @staticmethod
+    def write_excel(df: pd.DataFrame, output) -> None:
+        """Write the download table to output as an xlsx workbook.
+
+        xlsxwriter's constant_memory mode flushes each row to disk as soon as
+        the next one starts, so rows must be written in order - pandas'
+        to_excel writes column by column, hence the explicit write_row loop.
+        """
+        workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False
+        })
+        worksheet = workbook.add_worksheet('Pricing Results')
+        worksheet.write_row(0, 0, df.columns.tolist())
+        for row_num, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            # write_number rejects NaN and infinities and write_row rejects
+            # dicts and lists, so convert those cells the same way to_excel did
+            worksheet.write_row(row_num, 0, [_excel_value(value) for value in row])
+        workbook.close()
+
+def _excel_value(value):
+    """Convert one download cell for xlsxwriter the way to_excel did.
+
+    NaN becomes an empty cell, and infinities and non-scalars such as dicts
+    or lists are written as text.
+    """
+    if not pd.api.types.is_scalar(value):
+        return str(value)
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and math.isinf(value):
+        return 'inf' if value > 0 else '-inf'
+    return value
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv', 'xlsx', 'xls'}
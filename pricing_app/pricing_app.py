@@ -1,6 +1,128 @@
 import reflex as rx
+import functools
 import re
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+
+# Quantity pattern with an optional count prefix, so "10x100g" and "400g"
+# are both parsed in a single match
+_QTY_RE = re.compile(r'^(?:(\d+)[x*])?(\d+(?:\.\d+)?)([a-z]*)')
+
+# Grams per unit for every accepted spelling - a bare number counts as grams
+_UNIT_TO_G: Dict[str, float] = {
+    "kg": 1000.0, "kilogram": 1000.0, "kilograms": 1000.0,
+    "g": 1.0, "gram": 1.0, "grams": 1.0, "": 1.0,
+    "mg": 0.001, "milligram": 0.001, "milligrams": 0.001,
+}
+
+# Accepted unit spellings as bytes, so the scanner can reject unknown units
+# before decoding them
+_UNIT_TOKENS = frozenset(unit.encode() for unit in _UNIT_TO_G)
+_UNIT_MAX_LEN = max(len(unit) for unit in _UNIT_TOKENS)
+
+# Longer inputs skip the scanner so its integer maths stays within float range
+_SCAN_MAX_LEN = 32
+
+def _scan(quantity_str: str) -> Optional[Tuple[float, float, Optional[str]]]:
+    """Scan a normalized quantity into (count, weight, unit) in one pass.
+
+    Fast path for the common well-formed input such as "400g", "1.2kg" or
+    "10x100g". The unit is None when it can already be rejected - a letter
+    run longer than any accepted spelling, or one not in _UNIT_TOKENS.
+    Returns None for anything else it does not fully consume, leaving those
+    inputs to _QTY_RE.
+    """
+    buf = quantity_str.encode()
+    n = len(buf)
+    if n > _SCAN_MAX_LEN:
+        return None
+    
+    # Leading digits - either the count or the whole part of the weight
+    i = 0
+    acc = 0
+    while i < n and 0x30 <= buf[i] <= 0x39:
+        acc = acc * 10 + buf[i] - 0x30
+        i += 1
+    if i == 0:
+        return None
+    
+    # "x" or "*" followed by a digit splits count from weight
+    count = 1.0
+    if i + 1 < n and (buf[i] == 0x78 or buf[i] == 0x2a) and 0x30 <= buf[i + 1] <= 0x39:
+        count = float(acc)
+        acc = 0
+        i += 1
+        while i < n and 0x30 <= buf[i] <= 0x39:
+            acc = acc * 10 + buf[i] - 0x30
+            i += 1
+    
+    # Optional fractional part, which needs at least one digit
+    frac_div = 1
+    if i < n and buf[i] == 0x2e:
+        i += 1
+        start = i
+        while i < n and 0x30 <= buf[i] <= 0x39:
+            acc = acc * 10 + buf[i] - 0x30
+            frac_div *= 10
+            i += 1
+        if i == start:
+            return None
+    
+    # Trailing a-z run is the unit and must end the string
+    unit_start = i
+    while i < n and 0x61 <= buf[i] <= 0x7a:
+        i += 1
+        if i - unit_start > _UNIT_MAX_LEN:
+            return count, 0.0, None
+    if i != n:
+        return None
+    
+    unit = buf[unit_start:]
+    if unit not in _UNIT_TOKENS:
+        return count, 0.0, None
+    
+    return count, acc / frac_div, unit.decode()
+
+@functools.lru_cache(maxsize=256)
+def _parse_quantity(quantity_str: str) -> Optional[float]:
+    """Parse quantity string and return total grams.
+
+    Cached on the raw input, so re-calculating with an unchanged quantity
+    skips the parse entirely.
+    """
+    try:
+        # Remove spaces and convert to lowercase, skipping either step when
+        # the input is already clean (e.g. "400g")
+        if " " in quantity_str:
+            quantity_str = quantity_str.replace(" ", "")
+        if not (quantity_str.islower() or quantity_str.isdecimal()):
+            quantity_str = quantity_str.lower()
+        
+        # Handle multiplication (e.g., "10x100g", "20*1200g") and single
+        # quantity (e.g., "400g", "1.2kg") formats, scanning by hand and
+        # falling back to the regex for anything irregular
+        scanned = _scan(quantity_str)
+        if scanned is not None:
+            count, weight, unit = scanned
+            if unit is None:
+                return None
+        else:
+            match = _QTY_RE.match(quantity_str)
+            if match is None:
+                return None
+            
+            count = float(match.group(1)) if match.group(1) else 1.0
+            weight = float(match.group(2))
+            unit = match.group(3)
+        
+        unit = unit or "g"  # default to grams
+        total_weight = count * weight
+        
+        # Convert to grams
+        mult = _UNIT_TO_G.get(unit)
+        return None if mult is None else total_weight * mult
+            
+    except (ValueError, AttributeError, TypeError):
+        return None
 
 class PricingState(rx.State):
     """State for the pricing calculator app."""
@@ -9,7 +131,8 @@ class PricingState(rx.State):
     quantity_input: str = ""
     price_input: str = ""
     selected_unit: str = "kg"
-    results: Dict[str, float] = {}
+    price_g: float = 0.0
+    has_results: bool = False
     error_message: str = ""
     
     def set_ingredient_name(self, name: str):
@@ -26,59 +149,24 @@ class PricingState(rx.State):
     
     def parse_quantity(self, quantity_str: str) -> Optional[float]:
         """Parse quantity string and return total grams."""
-        try:
-            # Remove spaces and convert to lowercase
-            quantity_str = quantity_str.replace(" ", "").lower()
-            
-            # Handle multiplication format (e.g., "10x100g", "20*1200g")
-            mult_pattern = r'(\d+)[x*](\d+(?:\.\d+)?)([a-z]*)'  
-            mult_match = re.match(mult_pattern, quantity_str)
-            
-            if mult_match:
-                count = float(mult_match.group(1))
-                weight = float(mult_match.group(2))
-                unit = mult_match.group(3) or "g"  # default to grams
-                total_weight = count * weight
-            else:
-                # Handle single quantity format (e.g., "400g", "1.2kg")
-                single_pattern = r'(\d+(?:\.\d+)?)([a-z]*)'  
-                single_match = re.match(single_pattern, quantity_str)
-                
-                if single_match:
-                    total_weight = float(single_match.group(1))
-                    unit = single_match.group(2) or "g"  # default to grams
-                else:
-                    return None
-            
-            # Convert to grams
-            if unit in ["kg", "kilogram", "kilograms"]:
-                return total_weight * 1000
-            elif unit in ["g", "gram", "grams", ""]:
-                return total_weight
-            elif unit in ["mg", "milligram", "milligrams"]:
-                return total_weight / 1000
-            else:
-                return None
-                
-        except (ValueError, AttributeError):
-            return None
+        return _parse_quantity(quantity_str)
     
     def calculate_pricing(self):
         """Calculate pricing per different units."""
         self.error_message = ""
-        self.results = {}
+        self.has_results = False
         
-        if not self.ingredient_name.strip():
-            self.error_message = "Please enter an ingredient name."
-            return
-        
-        if not self.quantity_input.strip():
-            self.error_message = "Please enter a quantity."
-            return
-        
-        if not self.price_input.strip():
-            self.error_message = "Please enter a price."
-            return
+        # Check the required fields in order, skipping the strip for the
+        # empty default
+        fields = (
+            (self.ingredient_name, "Please enter an ingredient name."),
+            (self.quantity_input, "Please enter a quantity."),
+            (self.price_input, "Please enter a price."),
+        )
+        for value, message in fields:
+            if not value or not value.strip():
+                self.error_message = message
+                return
         
         try:
             price = float(self.price_input)
@@ -96,15 +184,43 @@ class PricingState(rx.State):
             self.error_message = "Quantity must be greater than zero."
             return
         
-        # Calculate price per gram
-        price_per_gram = price / total_grams
-        
-        # Calculate for different units
-        self.results = {
-            "kg": price_per_gram * 1000,
-            "g": price_per_gram,
-            "mg": price_per_gram / 1000
-        }
+        # Calculate price per gram - the other units are derived from it
+        self.price_g = price / total_grams
+        self.has_results = True
+    
+    @rx.var
+    def price_kg(self) -> float:
+        """Price per kilogram."""
+        return self.price_g * 1000
+    
+    @rx.var
+    def price_mg(self) -> float:
+        """Price per milligram."""
+        return self.price_g / 1000
+    
+    @rx.var
+    def price_kg_fmt(self) -> str:
+        """Price per kilogram, formatted for display."""
+        return f"₹{self.price_kg:.2f}" if self.has_results else ""
+    
+    @rx.var
+    def price_g_fmt(self) -> str:
+        """Price per gram, formatted for display."""
+        return f"₹{self.price_g:.4f}" if self.has_results else ""
+    
+    @rx.var
+    def price_mg_fmt(self) -> str:
+        """Price per milligram, formatted for display."""
+        return f"₹{self.price_mg:.6f}" if self.has_results else ""
+    
+    @rx.var
+    def price_selected_fmt(self) -> str:
+        """Price in the selected output unit, formatted for display."""
+        if self.selected_unit == "kg":
+            return self.price_kg_fmt
+        if self.selected_unit == "g":
+            return self.price_g_fmt
+        return self.price_mg_fmt
     
     def clear_form(self):
         """Clear all form inputs and results."""
@@ -112,9 +228,15 @@ class PricingState(rx.State):
         self.quantity_input = ""
         self.price_input = ""
         self.selected_unit = "kg"
-        self.results = {}
+        self.has_results = False
         self.error_message = ""
 
+# Shared component styles, built once rather than on every render
+_FOCUS_KW = {"border_color": "#3b82f6", "box_shadow": "0 0 0 3px rgba(59, 130, 246, 0.1)"}
+_INPUT_KW = dict(width="100%", padding="12px", border="1px solid #d1d5db", border_radius="8px", _focus=_FOCUS_KW)
+_CARD_KW = dict(bg="white", padding="12px", border_radius="8px", border="1px solid #e5e7eb", width="100%")
+_BUTTON_KW = dict(color="white", padding="12px 24px", border_radius="8px", font_weight="medium")
+
 def create_logo():
     """Create Mordor Intelligence logo placeholder."""
     return rx.hstack(
@@ -147,11 +269,7 @@ def input_form():
                 placeholder="e.g., Nat Frozen Whole Chicken Griller Box",
                 value=PricingState.ingredient_name,
                 on_change=PricingState.set_ingredient_name,
-                width="100%",
-                padding="12px",
-                border="1px solid #d1d5db",
-                border_radius="8px",
-                _focus={"border_color": "#3b82f6", "box_shadow": "0 0 0 3px rgba(59, 130, 246, 0.1)"}
+                **_INPUT_KW
             ),
             align_items="start",
             spacing="2",
@@ -165,11 +283,7 @@ def input_form():
                 placeholder="e.g., 10x1200g, 400g, 1.2kg",
                 value=PricingState.quantity_input,
                 on_change=PricingState.set_quantity_input,
-                width="100%",
-                padding="12px",
-                border="1px solid #d1d5db",
-                border_radius="8px",
-                _focus={"border_color": "#3b82f6", "box_shadow": "0 0 0 3px rgba(59, 130, 246, 0.1)"}
+                **_INPUT_KW
             ),
             align_items="start",
             spacing="2",
@@ -183,11 +297,7 @@ def input_form():
                 placeholder="e.g., 132.25",
                 value=PricingState.price_input,
                 on_change=PricingState.set_price_input,
-                width="100%",
-                padding="12px",
-                border="1px solid #d1d5db",
-                border_radius="8px",
-                _focus={"border_color": "#3b82f6", "box_shadow": "0 0 0 3px rgba(59, 130, 246, 0.1)"}
+                **_INPUT_KW
             ),
             align_items="start",
             spacing="2",
@@ -217,21 +327,15 @@ def input_form():
                 "Calculate",
                 on_click=PricingState.calculate_pricing,
                 bg="#3b82f6",
-                color="white",
-                padding="12px 24px",
-                border_radius="8px",
-                font_weight="medium",
-                _hover={"bg": "#2563eb"}
+                _hover={"bg": "#2563eb"},
+                **_BUTTON_KW
             ),
             rx.button(
                 "Clear",
                 on_click=PricingState.clear_form,
                 bg="#6b7280",
-                color="white",
-                padding="12px 24px",
-                border_radius="8px",
-                font_weight="medium",
-                _hover={"bg": "#4b5563"}
+                _hover={"bg": "#4b5563"},
+                **_BUTTON_KW
             ),
             spacing="3"
         ),
@@ -259,7 +363,7 @@ def input_form():
 def results_display():
     """Display calculation results."""
     return rx.cond(
-        PricingState.results != {},
+        PricingState.has_results,
         rx.vstack(
             rx.heading("Results", size="5", color="#1e293b", margin_bottom="3"),
             
@@ -268,15 +372,7 @@ def results_display():
                 rx.vstack(
                     rx.text("Price per " + PricingState.selected_unit.upper(), font_weight="bold", color="#374151"),
                     rx.text(
-                        rx.cond(
-                            PricingState.selected_unit == "kg",
-                            f"₹{PricingState.results.get('kg', 0):.2f}",
-                            rx.cond(
-                                PricingState.selected_unit == "g",
-                                f"₹{PricingState.results.get('g', 0):.4f}",
-                                f"₹{PricingState.results.get('mg', 0):.6f}"
-                            )
-                        ),
+                        PricingState.price_selected_fmt,
                         font_size="2xl",
                         font_weight="bold",
                         color="#059669"
@@ -297,75 +393,34 @@ def results_display():
         )
     )
 
+def _unit_card(emoji, label, value_var):
+    """Create a sidebar card showing the price for one unit."""
+    return rx.box(
+        rx.vstack(
+            rx.hstack(
+                rx.text(emoji, font_size="lg"),
+                rx.text(label, font_weight="medium", color="#374151"),
+                justify="start",
+                align_items="center",
+                spacing="2"
+            ),
+            rx.text(value_var, font_weight="bold", color="#059669"),
+            align_items="start",
+            spacing="1"
+        ),
+        **_CARD_KW
+    )
+
 def sidebar_results():
     """Display all unit variations in sidebar."""
     return rx.cond(
-        PricingState.results != {},
+        PricingState.has_results,
         rx.vstack(
             rx.heading("All Variations", size="4", color="#1e293b", margin_bottom="3"),
             
-            # Kilogram
-            rx.box(
-                rx.vstack(
-                    rx.hstack(
-                        rx.text("⚖️", font_size="lg"),
-                        rx.text("Per KG", font_weight="medium", color="#374151"),
-                        justify="start",
-                        align_items="center",
-                        spacing="2"
-                    ),
-                    rx.text(f"₹{PricingState.results.get('kg', 0):.2f}", font_weight="bold", color="#059669"),
-                    align_items="start",
-                    spacing="1"
-                ),
-                bg="white",
-                padding="12px",
-                border_radius="8px",
-                border="1px solid #e5e7eb",
-                width="100%"
-            ),
-            
-            # Gram
-            rx.box(
-                rx.vstack(
-                    rx.hstack(
-                        rx.text("📏", font_size="lg"),
-                        rx.text("Per Gram", font_weight="medium", color="#374151"),
-                        justify="start",
-                        align_items="center",
-                        spacing="2"
-                    ),
-                    rx.text(f"₹{PricingState.results.get('g', 0):.4f}", font_weight="bold", color="#059669"),
-                    align_items="start",
-                    spacing="1"
-                ),
-                bg="white",
-                padding="12px",
-                border_radius="8px",
-                border="1px solid #e5e7eb",
-                width="100%"
-            ),
-            
-            # Milligram
-            rx.box(
-                rx.vstack(
-                    rx.hstack(
-                        rx.text("🔬", font_size="lg"),
-                        rx.text("Per Milligram", font_weight="medium", color="#374151"),
-                        justify="start",
-                        align_items="center",
-                        spacing="2"
-                    ),
-                    rx.text(f"₹{PricingState.results.get('mg', 0):.6f}", font_weight="bold", color="#059669"),
-                    align_items="start",
-                    spacing="1"
-                ),
-                bg="white",
-                padding="12px",
-                border_radius="8px",
-                border="1px solid #e5e7eb",
-                width="100%"
-            ),
+            _unit_card("⚖️", "Per KG", PricingState.price_kg_fmt),
+            _unit_card("📏", "Per Gram", PricingState.price_g_fmt),
+            _unit_card("🔬", "Per Milligram", PricingState.price_mg_fmt),
             
             spacing="3",
             width="100%"
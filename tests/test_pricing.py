@@ -0,0 +1,19 @@
+import io
+
+from openpyxl import Workbook
+
+from pricing import PricingCalculator
+
+
+def test_read_xlsx_uses_first_sheet_when_another_is_active():
+    workbook = Workbook()
+    workbook.active.append(['Sugar', '400g', 100])
+    workbook.create_sheet('Notes').append(['notes', 'x'])
+    workbook.active = 1
+    upload = io.BytesIO()
+    workbook.save(upload)
+    upload.seek(0)
+
+    df = PricingCalculator.read_upload(upload, 'items.xlsx')
+
+    assert df.values.tolist() == [['Sugar', '400g', 100]]